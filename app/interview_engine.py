@@ -38,7 +38,7 @@ class InterviewEngine:
 
     def check_red_flags(self, patient_state) -> Optional[dict]:
         """Return a red-flag rule dict if triggered, else None."""
-        with open(CFG_DIR / "red_flags.json") as f:
+        with open(CFG_DIR / "red_flags.json", encoding="utf-8") as f:
             rules = json.load(f)
 
         features = patient_state.to_feature_dict()
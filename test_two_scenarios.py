@@ -2,83 +2,171 @@
 Test two scenarios: high-risk (chest pain) and low-risk (headache) to verify percentages.
 """
 
-from playwright.sync_api import sync_playwright
-import time
+from playwright.sync_api import sync_playwright, Error as PlaywrightError
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+import os
 import re
 
 BASE_URL = "http://localhost:5001"
 
-def extract_percentages_and_counts(page):
-    """Extract risk percentages and any patient counts from the page."""
-    
-    page_content = page.content()
+# Set HEADFUL=1 to watch the runs in a visible browser window
+HEADLESS = os.environ.get('HEADFUL') != '1'
+
+# The app is plain server-rendered forms: no GPU, extensions or background
+# networking needed
+BROWSER_ARGS = [
+    '--disable-gpu',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-extensions',
+    '--disable-default-apps',
+    '--no-first-run',
+]
+
+# Set RUNS=N to repeat both scenarios N times without relaunching the browsers
+RUNS = int(os.environ.get('RUNS', '1'))
+
+# Set SCREENSHOTS=1 to save a snapshot of each results page
+SCREENSHOTS = os.environ.get('SCREENSHOTS') == '1'
+
+# Screenshot files are written off the scenario threads
+screenshot_writer = ThreadPoolExecutor(max_workers=1)
+pending_screenshots = []
+
+RISK_LABELS = [
+    "Likelihood of needing immediate medical attention",
+    "Likelihood of hospitalization",
+    "Likelihood of death"
+]
+
+# Each label followed by the first percentage rendered after it
+RISK_RES = {
+    label: re.compile(re.escape(label) + r'[\s\S]{0,200}?(?<![\d.])(\d+\.?\d*)%', re.IGNORECASE)
+    for label in RISK_LABELS
+}
+
+# Common patterns for patient counts, fused so the page is scanned once
+COUNT_RE = re.compile(
+    r'(\d{1,3}(?:,\d{3})+)\s+(?:similar\s+)?patients'
+    r'|(\d{1,3}(?:,\d{3})+)\s+emergency\s+visits'
+    r'|Based\s+on\s+(?:data\s+from\s+)?(\d{1,3}(?:,\d{3})+)'
+    r'|(\d{1,3}(?:,\d{3})+)\s+(?:patients|visits|cases)',
+    re.IGNORECASE,
+)
+
+SOURCE_KEYWORDS = [
+    'published', 'literature', 'research', 'study', 'studies',
+    'clinical data', 'medical literature', 'evidence'
+]
+
+# Context window around each source keyword
+SOURCE_RES = {
+    keyword: re.compile(rf'.{{0,50}}{keyword}.{{0,50}}', re.IGNORECASE)
+    for keyword in SOURCE_KEYWORDS
+}
+
+# All h1-h3 texts in one round trip
+HEADINGS_JS = "() => Array.from(document.querySelectorAll('h1, h2, h3'), e => e.textContent.trim())"
+
+# Which answer controls the current question offers, in one round trip
+FORM_SHAPE_JS = """() => ({
+    btns: document.querySelectorAll('button[name="answer"]').length,
+    ta: document.querySelectorAll('textarea[name="answer"]').length,
+    num: document.querySelectorAll('input[type="number"]').length,
+    submit: document.querySelectorAll('button[type="submit"]').length,
+})"""
+
+# Question keyword -> lowercase substrings identifying the low-risk answer
+LOW_RISK_KEYWORDS = {
+    'gradually': ('gradually', 'slowly', 'built up'),
+    'worst': ('no',),
+    'pain': ('3', '2', '1', 'mild', '1-3'),
+    'side': ('all', 'both'),
+    'feel': ('dull', 'aching', 'pressure'),
+    'stiff': ('no',),
+    'fever': ('no',),
+    'vision': ('no',),
+    'weakness': ('no',),
+    'speaking': ('no',),
+    'confused': ('no',),
+    'nausea': ('no', 'feeling fine'),
+    'before': ('yes', 'had headaches'),
+    'injury': ('no',),
+    'thinners': ('no', 'not sure')
+}
+
+@lru_cache(maxsize=8)
+def _extract_from_text(page_text):
+    """Parse risk percentages, patient counts and source mentions from page text.
+
+    Pure function of the text, so re-extracting an identical page is a
+    cache hit. Results are returned as tuples so the cached value cannot
+    be mutated by callers.
+    """
     
     # Look for the three risk percentages
-    risk_data = {}
-    
-    risk_labels = [
-        "Likelihood of needing immediate medical attention",
-        "Likelihood of hospitalization", 
-        "Likelihood of death"
-    ]
-    
-    print("\n  📊 RISK PERCENTAGES:")
-    for label in risk_labels:
-        try:
-            # Find the label
-            label_elem = page.locator(f'text=/{label}/i').first
-            if label_elem.count() > 0:
-                # Get parent container
-                parent = label_elem.locator('xpath=..')
-                parent_text = parent.text_content()
-                
-                # Extract percentage
-                matches = re.findall(r'(\d+\.?\d*)%', parent_text)
-                if matches:
-                    percentage = matches[0] + '%'
-                    print(f"    ✓ {label}: {percentage}")
-                    risk_data[label] = percentage
-        except:
-            pass
+    risk_data = []
+    for label, pattern in RISK_RES.items():
+        match = pattern.search(page_text)
+        if match:
+            risk_data.append((label, match.group(1) + '%'))
     
     # Look for ANY patient count numbers
-    print("\n  🔍 CHECKING FOR PATIENT COUNTS:")
+    found_counts = tuple(
+        next(g for g in match.groups() if g)
+        for match in COUNT_RE.finditer(page_text)
+    )
+    
+    # Look for data source references
+    found_sources = []
+    page_lower = page_text.lower()
+    for keyword, pattern in SOURCE_RES.items():
+        if keyword in page_lower:
+            # Find context around the first mention of the keyword
+            match = pattern.search(page_text)
+            if match:
+                found_sources.append(match.group(0).strip())
+    
+    return tuple(risk_data), found_counts, tuple(found_sources)
+
+def pick_low_risk_answer(question_text, answers):
+    """Return the index of the low-risk answer to a question, or None.
+
+    Both the question and the answers must already be lowercase. Plain
+    substring checks are enough for a table this small.
+    """
+    for keyword, options in LOW_RISK_KEYWORDS.items():
+        if keyword in question_text:
+            for i, answer in enumerate(answers):
+                if any(opt in answer for opt in options):
+                    return i
+    return None
+
+def extract_percentages_and_counts(page):
+    """Extract risk percentages and any patient counts from the page."""
     
-    # Common patterns for patient counts
-    count_patterns = [
-        r'(\d{1,3}(?:,\d{3})+)\s+(?:similar\s+)?patients',
-        r'(\d{1,3}(?:,\d{3})+)\s+emergency\s+visits',
-        r'Based\s+on\s+(?:data\s+from\s+)?(\d{1,3}(?:,\d{3})+)',
-        r'(\d{1,3}(?:,\d{3})+)\s+(?:patients|visits|cases)',
-    ]
+    # Rendered text only: much smaller than the serialized HTML and free
+    # of markup that could split a phrase across tags
+    page_text = page.evaluate("() => document.body.innerText")
+    risk_items, found_counts, found_sources = _extract_from_text(page_text)
+    risk_data = dict(risk_items)
+    found_counts = list(found_counts)
+    found_sources = list(found_sources)
     
-    found_counts = []
-    for pattern in count_patterns:
-        matches = re.findall(pattern, page_content, re.IGNORECASE)
-        found_counts.extend(matches)
+    print("\n  📊 RISK PERCENTAGES:")
+    for label, percentage in risk_data.items():
+        print(f"    ✓ {label}: {percentage}")
     
+    print("\n  🔍 CHECKING FOR PATIENT COUNTS:")
     if found_counts:
         print(f"    ✗ FOUND patient counts: {found_counts}")
     else:
         print(f"    ✓ NO specific patient counts found")
     
-    # Look for data source references
     print("\n  📚 DATA SOURCE REFERENCES:")
-    
-    source_keywords = [
-        'published', 'literature', 'research', 'study', 'studies',
-        'clinical data', 'medical literature', 'evidence'
-    ]
-    
-    found_sources = []
-    for keyword in source_keywords:
-        if keyword in page_content.lower():
-            # Find context around keyword
-            pattern = rf'.{{0,50}}{keyword}.{{0,50}}'
-            matches = re.findall(pattern, page_content, re.IGNORECASE)
-            if matches:
-                found_sources.extend([m.strip() for m in matches[:2]])
-    
     if found_sources:
         for source in found_sources[:3]:
             print(f"    - {source[:100]}")
@@ -87,6 +175,47 @@ def extract_percentages_and_counts(page):
     
     return risk_data, found_counts, found_sources
 
+def submit(page, control):
+    """Click a form control and wait for the page it navigates to."""
+    with page.expect_navigation(wait_until='domcontentloaded', timeout=5000):
+        control.click()
+
+def save_screenshot(page, path):
+    """Save a JPEG of the visible viewport when SCREENSHOTS is enabled.
+
+    The image is captured here but written to disk on a background thread;
+    call flush_screenshots() before relying on the files.
+    """
+    if not SCREENSHOTS:
+        return
+    data = page.screenshot(type='jpeg', quality=70, full_page=False)
+    pending_screenshots.append(screenshot_writer.submit(Path(path).write_bytes, data))
+    print(f"\n  📸 Screenshot saved: {path}")
+
+def flush_screenshots():
+    """Block until every queued screenshot has been written."""
+    while pending_screenshots:
+        pending_screenshots.pop().result()
+
+def is_shown(locator, timeout=3000):
+    """Wait for a locator to become visible; False if it never does."""
+    try:
+        locator.wait_for(state='visible', timeout=timeout)
+    except PlaywrightError:
+        return False
+    return True
+
+def wait_for_results(page):
+    """Wait for the results page; if it never loads, say so and carry on.
+
+    The caller still reads whatever page is showing, so a scenario that
+    stalls returns its partial results instead of aborting the comparison.
+    """
+    try:
+        page.wait_for_url("**/results*")
+    except PlaywrightError:
+        print(f"  ✗ Did not reach results page (stuck on {page.url})")
+
 def test_high_risk_scenario(page):
     """Test 1: High-risk chest pain + breathing."""
     
@@ -97,7 +226,6 @@ def test_high_risk_scenario(page):
     # Step 1: Go to homepage
     print("\n[STEP 1] Visiting homepage...")
     page.goto(BASE_URL)
-    page.wait_for_load_state('networkidle')
     print("✓ Homepage loaded")
     
     # Step 2: Accept disclaimer
@@ -105,8 +233,7 @@ def test_high_risk_scenario(page):
     consent_checkbox = page.locator('input[type="checkbox"]#consent')
     consent_checkbox.check()
     start_button = page.locator('button[type="submit"]')
-    start_button.click()
-    page.wait_for_load_state('networkidle')
+    submit(page, start_button)
     print("✓ Started interview")
     
     # Step 3: Age and Sex
@@ -114,35 +241,28 @@ def test_high_risk_scenario(page):
     page.wait_for_selector('input[type="number"]', timeout=5000)
     age_input = page.locator('input[type="number"]')
     age_input.fill('55')
-    page.locator('button[type="submit"]').click()
-    page.wait_for_load_state('networkidle')
+    submit(page, page.locator('button[type="submit"]'))
     print("  Age: 55")
     
-    time.sleep(0.5)
     male_button = page.locator('button[name="answer"][value="male"]')
-    male_button.click()
-    page.wait_for_load_state('networkidle')
+    submit(page, male_button)
     print("  Sex: Male")
     print("✓ Demographics submitted")
     
     # Step 4: Symptoms
     print("\n[STEP 4] Entering symptoms...")
-    time.sleep(0.5)
     textarea = page.locator('textarea[name="answer"]')
-    if textarea.count() > 0:
+    if is_shown(textarea):
         symptom_text = "I have chest pain and I'm having trouble breathing"
         textarea.fill(symptom_text)
         print(f"  Typed: '{symptom_text}'")
         
-        time.sleep(0.3)
         submit_button = page.locator('button[type="submit"]')
-        submit_button.click()
-        page.wait_for_load_state('networkidle')
+        submit(page, submit_button)
         print("✓ Symptoms submitted")
     
     # Step 5: Check if we're at results (red flag may trigger)
     print("\n[STEP 5] Checking page...")
-    time.sleep(0.5)
     
     if '/results' in page.url:
         print("✓ Red flag triggered - went directly to results")
@@ -152,31 +272,30 @@ def test_high_risk_scenario(page):
         attempts = 0
         while '/results' not in page.url and attempts < 5:
             try:
-                if page.locator('button[name="answer"]').count() > 0:
-                    page.locator('button[name="answer"]').first.click()
-                elif page.locator('textarea[name="answer"]').count() > 0:
+                shape = page.evaluate(FORM_SHAPE_JS)
+                if shape['btns']:
+                    submit(page, page.locator('button[name="answer"]').first)
+                elif shape['ta']:
                     page.locator('textarea[name="answer"]').fill('none')
-                    page.locator('button[type="submit"]').click()
-                elif page.locator('button[type="submit"]').count() > 0:
-                    page.locator('button[type="submit"]').click()
+                    submit(page, page.locator('button[type="submit"]'))
+                elif shape['submit']:
+                    submit(page, page.locator('button[type="submit"]'))
                 else:
                     break
                 
-                page.wait_for_load_state('networkidle')
                 attempts += 1
-            except:
+            except PlaywrightError:
                 break
         
         print("✓ Reached results page")
     
     # Step 6: Analyze results
     print("\n[STEP 6] Analyzing results page...")
-    time.sleep(0.5)
     
     # Get recommendation
-    headings = page.locator('h1, h2, h3').all()
-    for heading in headings:
-        text = heading.text_content().strip()
+    wait_for_results(page)
+    headings = page.evaluate(HEADINGS_JS)
+    for text in headings:
         if any(word in text.lower() for word in ['emergency', 'urgent', 'primary', 'call']):
             print(f"\n  📋 RECOMMENDATION: {text}")
             break
@@ -185,8 +304,7 @@ def test_high_risk_scenario(page):
     risk_data, patient_counts, sources = extract_percentages_and_counts(page)
     
     # Take screenshot
-    page.screenshot(path='screenshots/test1_high_risk_results.png')
-    print(f"\n  📸 Screenshot saved: screenshots/test1_high_risk_results.png")
+    save_screenshot(page, 'screenshots/test1_high_risk_results.jpg')
     
     return risk_data, patient_counts, sources
 
@@ -197,20 +315,17 @@ def test_low_risk_scenario(page):
     print("TEST 2: LOW-RISK SCENARIO (Simple Headache)")
     print("=" * 70)
     
-    # Step 7: Click Start Over
-    print("\n[STEP 7] Starting over...")
-    start_over = page.locator('a[href="/restart"], a[href="/"]').first
-    start_over.click()
-    page.wait_for_load_state('networkidle')
-    print("✓ Returned to homepage")
+    # Step 7: Go to homepage
+    print("\n[STEP 7] Visiting homepage...")
+    page.goto(BASE_URL)
+    print("✓ Homepage loaded")
     
     # Step 8: Accept disclaimer
     print("\n[STEP 8] Accepting disclaimer...")
     consent_checkbox = page.locator('input[type="checkbox"]#consent')
     consent_checkbox.check()
     start_button = page.locator('button[type="submit"]')
-    start_button.click()
-    page.wait_for_load_state('networkidle')
+    submit(page, start_button)
     print("✓ Started interview")
     
     # Step 9: Age and Sex
@@ -218,122 +333,85 @@ def test_low_risk_scenario(page):
     page.wait_for_selector('input[type="number"]', timeout=5000)
     age_input = page.locator('input[type="number"]')
     age_input.fill('25')
-    page.locator('button[type="submit"]').click()
-    page.wait_for_load_state('networkidle')
+    submit(page, page.locator('button[type="submit"]'))
     print("  Age: 25")
     
-    time.sleep(0.5)
     female_button = page.locator('button[name="answer"][value="female"]')
-    female_button.click()
-    page.wait_for_load_state('networkidle')
+    submit(page, female_button)
     print("  Sex: Female")
     print("✓ Demographics submitted")
     
     # Step 10: Symptoms
     print("\n[STEP 10] Entering symptoms...")
-    time.sleep(0.5)
     textarea = page.locator('textarea[name="answer"]')
-    if textarea.count() > 0:
+    if is_shown(textarea):
         symptom_text = "I have a headache"
         textarea.fill(symptom_text)
         print(f"  Typed: '{symptom_text}'")
         
-        time.sleep(0.3)
         submit_button = page.locator('button[type="submit"]')
-        submit_button.click()
-        page.wait_for_load_state('networkidle')
+        submit(page, submit_button)
         print("✓ Symptoms submitted")
     
     # Step 11: PMH
     print("\n[STEP 11] Entering PMH...")
-    time.sleep(0.5)
     textarea = page.locator('textarea[name="answer"]')
-    if textarea.count() > 0:
+    if is_shown(textarea):
         pmh_text = "none"
         textarea.fill(pmh_text)
         print(f"  Typed: '{pmh_text}'")
         
-        time.sleep(0.3)
         submit_button = page.locator('button[type="submit"]')
-        submit_button.click()
-        page.wait_for_load_state('networkidle')
+        submit(page, submit_button)
         print("✓ PMH submitted")
     
     # Step 12: Answer follow-up questions with LOW RISK answers
     print("\n[STEP 12] Answering follow-up questions with LOW RISK answers...")
     
-    low_risk_keywords = {
-        'gradually': ['gradually', 'slowly', 'built up'],
-        'worst': ['no'],
-        'pain': ['3', '2', '1', 'mild', '1-3'],
-        'side': ['all', 'both'],
-        'feel': ['dull', 'aching', 'pressure'],
-        'stiff': ['no'],
-        'fever': ['no'],
-        'vision': ['no'],
-        'weakness': ['no'],
-        'speaking': ['no'],
-        'confused': ['no'],
-        'nausea': ['no', 'feeling fine'],
-        'before': ['yes', 'had headaches'],
-        'injury': ['no'],
-        'thinners': ['no', 'not sure']
-    }
-    
     question_count = 0
     max_questions = 20
     
     while question_count < max_questions:
-        time.sleep(0.3)
-        
-        if '/results' in page.url:
+        if '/results' in page.url or '/processing' in page.url:
             print(f"  Reached results after {question_count} questions")
             break
         
         try:
-            question_elem = page.locator('.bg-gray-100.rounded-2xl').last
+            question_elem = page.locator('h2').first
+            question_elem.wait_for()
             question_text = question_elem.text_content().strip().lower()
             
             print(f"  Q{question_count + 1}: {question_text[:60]}...")
             
             # Check for different input types
-            if page.locator('button[name="answer"]').count() > 0:
+            shape = page.evaluate(FORM_SHAPE_JS)
+            if shape['btns']:
                 # Single choice - find low risk option
-                buttons = page.locator('button[name="answer"]').all()
-                
-                clicked = False
-                # Try to match low risk keywords
-                for keyword, options in low_risk_keywords.items():
-                    if keyword in question_text:
-                        for btn in buttons:
-                            btn_text = btn.text_content().strip().lower()
-                            if any(opt in btn_text for opt in options):
-                                btn.click()
-                                print(f"       → {btn.text_content().strip()}")
-                                clicked = True
-                                break
-                        if clicked:
-                            break
+                buttons = page.locator('button[name="answer"]')
+                # All button labels in one RPC
+                btn_texts = [t.strip() for t in buttons.all_text_contents()]
+                btn_texts_lower = [t.lower() for t in btn_texts]
                 
-                if not clicked:
-                    # Default to first option
-                    buttons[0].click()
-                    print(f"       → {buttons[0].text_content().strip()}")
+                # Try to match low risk keywords, defaulting to first option
+                choice = pick_low_risk_answer(question_text, btn_texts_lower)
+                if choice is None:
+                    choice = 0
+                submit(page, buttons.nth(choice))
+                print(f"       → {btn_texts[choice]}")
             
-            elif page.locator('textarea[name="answer"]').count() > 0:
+            elif shape['ta']:
                 page.locator('textarea[name="answer"]').fill('mild, gradual')
-                page.locator('button[type="submit"]').click()
+                submit(page, page.locator('button[type="submit"]'))
                 print(f"       → mild, gradual")
             
-            elif page.locator('input[type="number"]').count() > 0:
+            elif shape['num']:
                 page.locator('input[type="number"]').fill('3')
-                page.locator('button[type="submit"]').click()
+                submit(page, page.locator('button[type="submit"]'))
                 print(f"       → 3")
             
-            page.wait_for_load_state('networkidle')
             question_count += 1
             
-        except Exception as e:
+        except PlaywrightError as e:
             print(f"  Error: {e}")
             break
     
@@ -341,12 +419,11 @@ def test_low_risk_scenario(page):
     
     # Step 13: Analyze results
     print("\n[STEP 13] Analyzing results page...")
-    time.sleep(0.5)
     
     # Get recommendation
-    headings = page.locator('h1, h2, h3').all()
-    for heading in headings:
-        text = heading.text_content().strip()
+    wait_for_results(page)
+    headings = page.evaluate(HEADINGS_JS)
+    for text in headings:
         if any(word in text.lower() for word in ['emergency', 'urgent', 'primary', 'call', 'see']):
             print(f"\n  📋 RECOMMENDATION: {text}")
             break
@@ -355,35 +432,63 @@ def test_low_risk_scenario(page):
     risk_data, patient_counts, sources = extract_percentages_and_counts(page)
     
     # Take screenshot
-    page.screenshot(path='screenshots/test2_low_risk_results.png')
-    print(f"\n  📸 Screenshot saved: screenshots/test2_low_risk_results.png")
+    save_screenshot(page, 'screenshots/test2_low_risk_results.jpg')
     
     return risk_data, patient_counts, sources
 
-def main():
-    """Run both tests."""
+def run_scenario(scenario, runs=1):
+    """Run one scenario `runs` times on a browser owned by this thread.
+
+    The sync Playwright API is bound to the thread that started it, so each
+    worker thread drives its own Playwright instance. The browser is launched
+    once and kept warm across runs; every run gets a fresh context so no
+    session state carries over. Returns the list of per-run results; a run
+    that fails is reported and recorded as empty, so it does not discard
+    the others.
+    """
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=HEADLESS, args=BROWSER_ARGS)
+        try:
+            for run in range(1, runs + 1):
+                context = browser.new_context(viewport={'width': 1280, 'height': 800})
+                # Fail fast when an element never appears instead of waiting 30 s
+                context.set_default_timeout(5000)
+                try:
+                    results.append(scenario(context.new_page()))
+                except PlaywrightError as e:
+                    print(f"\n✗ {scenario.__name__} run {run} failed: {e}")
+                    results.append(({}, [], []))
+                finally:
+                    context.close()
+        finally:
+            browser.close()
+    return results
+
+def main(runs=1):
+    """Run both tests, repeating them `runs` times on the same browsers."""
     
     print("=" * 70)
     print("TRIAGE APP - TWO SCENARIO COMPARISON TEST")
     print("=" * 70)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(viewport={'width': 1280, 'height': 800})
-        page = context.new_page()
-        
-        try:
+    try:
+        # The scenarios are independent, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
             # Test 1: High risk
-            risk1, counts1, sources1 = test_high_risk_scenario(page)
-            
-            time.sleep(2)
-            
+            future1 = executor.submit(run_scenario, test_high_risk_scenario, runs)
             # Test 2: Low risk
-            risk2, counts2, sources2 = test_low_risk_scenario(page)
+            future2 = executor.submit(run_scenario, test_low_risk_scenario, runs)
             
+            results1 = future1.result()
+            results2 = future2.result()
+        flush_screenshots()
+        
+        for run, ((risk1, counts1, sources1), (risk2, counts2, sources2)) in enumerate(
+                zip(results1, results2), start=1):
             # Final comparison
             print("\n" + "=" * 70)
-            print("FINAL COMPARISON")
+            print("FINAL COMPARISON" + (f" (run {run}/{runs})" if runs > 1 else ""))
             print("=" * 70)
             
             print("\n📊 TEST 1 (High-Risk: Chest Pain + Breathing):")
@@ -426,23 +531,18 @@ def main():
                     print(f"  Test 1: Immediate ({t1_immediate}%) >= Hospitalization ({t1_hosp}%): {t1_immediate >= t1_hosp}")
                     print(f"  Test 2: Immediate ({t2_immediate}%) >= Hospitalization ({t2_hosp}%): {t2_immediate >= t2_hosp}")
                     print(f"  Test 1 > Test 2 (high risk > low risk): {t1_immediate > t2_immediate}")
-            except:
+            except ValueError:
                 print(f"  Could not parse percentages for comparison")
             
             print("\n" + "=" * 70)
-            
-            time.sleep(3)
-            
-        except Exception as e:
-            print(f"\n✗ ERROR: {e}")
-            import traceback
-            traceback.print_exc()
         
-        finally:
-            browser.close()
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
 
 if __name__ == "__main__":
-    import os
-    os.makedirs('screenshots', exist_ok=True)
+    if SCREENSHOTS:
+        os.makedirs('screenshots', exist_ok=True)
     
-    main()
+    main(RUNS)
@@ -25,25 +25,37 @@ Output (all saved to app/models/ and app/config/)
 - training_report.txt
 """
 
-import json
+import hashlib
+import io
+import os
+import sys
 import warnings
 import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
 import joblib
+import orjson
+from joblib import Parallel, delayed
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from pathlib import Path
-from collections import Counter
 
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split, StratifiedShuffleSplit
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
-    classification_report, confusion_matrix, roc_auc_score,
+    precision_recall_fscore_support, confusion_matrix,
     accuracy_score, f1_score
 )
 from sklearn.calibration import CalibratedClassifierCV
-from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.frozen import FrozenEstimator
+from xgboost import XGBClassifier
 
 warnings.filterwarnings("ignore", category=FutureWarning)
+# Column selections like df[feature_cols] share the parent's memory
+# until written to, instead of copying the whole feature table
+pd.set_option("mode.copy_on_write", True)
 
 BASE_DIR   = Path(__file__).resolve().parent
 MIMIC_PATH = BASE_DIR / "outputs" / "triage_app" / "triage_dataset.csv.gz"
@@ -55,6 +67,28 @@ CFG_DIR    = BASE_DIR / "app" / "config"
 REPORT_DIR = BASE_DIR / "outputs" / "triage_app"
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
+# LZ4 decompresses several times faster than zlib, which is what the app
+# pays for at every worker start; fall back to zlib without python-lz4
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESS = ("lz4", 3)
+except ImportError:
+    MODEL_COMPRESS = ("zlib", 3)
+
+# XGB_DEVICE=cuda builds the trees on a GPU (XGBoost >= 2.0 CUDA build);
+# the fitted model is switched back to CPU before calibration and saving
+XGB_DEVICE = os.environ.get("XGB_DEVICE", "cpu")
+
+# Bump whenever load_dataset() changes how the cached table is built
+DATASET_CACHE_VERSION = 1
+
+# JSON artifacts: 2-space indent like json.dump(indent=2); numpy scalars and
+# the integer level keys in evidence_stats are serialised as-is
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Continuous features (standardised for the models); everything else is a 0/1 flag
+NUMERIC_COLS = ["age", "n_symptoms", "n_comorbidities"]
+
 LEVEL_LABELS = {
     1: "Emergency Department",
     2: "Urgent Care",
@@ -202,34 +236,159 @@ RED_FLAG_RULES = [
 ]
 
 
-def main():
-    print("=" * 70)
-    print("  TRAIN TRIAGE MODEL")
-    print("=" * 70)
-
-    # ── 1. LOAD DATA ──────────────────────────────────────────────────
-    print("\n[1/7] Loading dataset...")
+def read_dataset(path):
+    """
+    Read a dataset CSV with Arrow's multithreaded parser and declared
+    column types instead of pandas' per-column inference.
+    Feature columns are read as float32: rows from one source can leave
+    the other source's flags blank (or written as 1.0), so they are
+    filled and narrowed to int8 later, during feature selection.
+    """
+    with pa_csv.open_csv(path) as reader:
+        header = reader.schema.names
+    column_types = {
+        c: pa.float32() for c in header
+        if c.startswith(("sym_", "pmh_")) or c in ("age", "gender_male", "n_symptoms", "n_comorbidities")
+    }
+    table = pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+    return table.to_pandas()
+
+
+def dataset_cache_path(paths):
+    """
+    Path of the cached feature table for these input files.  The name
+    carries an MD5 of each file's path, size and mtime plus the cache
+    version and NUMERIC_COLS, so neither a regenerated CSV nor a change to
+    the table preparation hits a stale cache; the key costs a stat, not
+    a read.
+    """
+    digest = hashlib.md5(f"v{DATASET_CACHE_VERSION}|{','.join(NUMERIC_COLS)}\n".encode())
+    for path in paths:
+        st = path.stat()
+        digest.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return REPORT_DIR / f"train_cache_{digest.hexdigest()}.parquet"
+
+
+def load_dataset():
+    """
+    Load the training rows (combined or MIMIC-only, plus textbook cases)
+    reduced to features, target and source.  Flags are NaN-filled and
+    narrowed to int8, numerics to float32, so the scaler emits float32
+    (the precision XGBoost bins at) instead of float64.
+    The table is cached as Parquet; reruns on unchanged CSVs skip the
+    parse, merge and conversion entirely.  Bump DATASET_CACHE_VERSION
+    with any change to how the table is built here.
+    """
     if COMBINED_PATH.exists():
-        print("    Using combined MIMIC + NHAMCS dataset")
-        df = pd.read_csv(COMBINED_PATH)
+        data_path = COMBINED_PATH
     elif MIMIC_PATH.exists():
-        print("    Using MIMIC-only dataset")
-        df = pd.read_csv(MIMIC_PATH)
-        df["source"] = "mimic"
+        data_path = MIMIC_PATH
     else:
         raise FileNotFoundError("No dataset found")
 
+    input_paths = [data_path] + ([TEXTBOOK_PATH] if TEXTBOOK_PATH.exists() else [])
+    cache_path = dataset_cache_path(input_paths)
+    if cache_path.exists():
+        print(f"    Using cached feature table {cache_path.name}")
+        return pd.read_parquet(cache_path)
+
+    if data_path == COMBINED_PATH:
+        print("    Using combined MIMIC + NHAMCS dataset")
+        df = read_dataset(COMBINED_PATH)
+    else:
+        print("    Using MIMIC-only dataset")
+        df = read_dataset(MIMIC_PATH)
+        df["source"] = "mimic"
+
     if "source" not in df.columns:
         df["source"] = "mimic"
 
-    # Merge textbook synthetic cases if available
+    flag_cols = df.columns[df.columns.str.startswith(("sym_", "pmh_"))].tolist() + ["gender_male"]
+    keep_cols = flag_cols + NUMERIC_COLS + ["triage_level", "source"]
+    df = df[keep_cols]
+
+    # Merge textbook synthetic cases if available.  They are first cut and
+    # cast to the main frame's columns and dtypes, so the concat stacks
+    # matching blocks instead of upcasting columns only one side has.
     if TEXTBOOK_PATH.exists():
-        tb_df = pd.read_csv(TEXTBOOK_PATH)
+        tb_df = read_dataset(TEXTBOOK_PATH)
         if "source" not in tb_df.columns:
             tb_df["source"] = "textbook"
         print(f"    Merging {len(tb_df):,} textbook synthetic cases")
+        tb_df = tb_df.reindex(columns=keep_cols).astype(df.dtypes.to_dict())
         df = pd.concat([df, tb_df], ignore_index=True)
 
+    df = df.fillna(dict.fromkeys(flag_cols + NUMERIC_COLS, 0))
+    df = df.astype({**dict.fromkeys(flag_cols, np.int8), **dict.fromkeys(NUMERIC_COLS, np.float32)})
+
+    for old in REPORT_DIR.glob("train_cache_*.parquet"):
+        old.unlink()
+    df.to_parquet(cache_path, engine="pyarrow", compression="zstd", index=False)
+    print(f"    Cached feature table as {cache_path.name}")
+    return df
+
+
+def red_flag_mask(rules, X, feature_cols):
+    """
+    Boolean per row of X: does any red-flag rule fire?  Applies the
+    interview's check (every condition met, age >= age_min, and a rule
+    with no conditions never fires) to all rules at once: with a
+    (rules x features) 0/1 condition matrix M, a rule fires when X @ M.T
+    reaches its number of conditions.  That count only equals the
+    interview's per-column ">= value" test for 0/1 flag columns required
+    to be 1, so any other condition is rejected up front.
+    Rules naming a column the data lacks can never fire (absent = 0).
+    """
+    for rule in rules:
+        unsupported = {c: v for c, v in rule["conditions"].items() if c in NUMERIC_COLS or v != 1}
+        if unsupported:
+            raise ValueError(
+                f"Red-flag rule {rule['id']!r}: only 0/1 flag conditions equal to 1 "
+                f"are supported, got {unsupported}"
+            )
+    col_index = {c: i for i, c in enumerate(feature_cols)}
+    rules = [r for r in rules if r["conditions"] and all(c in col_index for c in r["conditions"])]
+    M = np.zeros((len(rules), len(feature_cols)), dtype=np.float32)
+    for i, rule in enumerate(rules):
+        M[i, [col_index[c] for c in rule["conditions"]]] = 1
+    age_min = np.array([r.get("age_min", -np.inf) for r in rules], dtype=np.float32)
+    fired = (X @ M.T >= M.sum(axis=1)) & (X[:, [col_index["age"]]] >= age_min)
+    return fired.any(axis=1)
+
+
+def class_report_lines(y_true, y_pred, labels):
+    """
+    Per-level precision/recall/F1/support table for the given levels, in
+    classification_report's layout, built from the per-level metric arrays.
+    """
+    names = [f"L{i} {LEVEL_LABELS[i]}" for i in labels]
+    p, r, f, s = precision_recall_fscore_support(y_true, y_pred, labels=labels, zero_division=0)
+    width = max(len(n) for n in names + ["weighted avg"])
+    row = f"{{:>{width}}}  {{:>9.2f}} {{:>9.2f}} {{:>9.2f}} {{:>9}}"
+    lines = [f"{'':>{width}}  {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}", ""]
+    lines += [row.format(n, *vals) for n, *vals in zip(names, p, r, f, s)]
+    lines.append("")
+    # Accuracy equals micro-averaged F1 when every prediction is one of
+    # the listed levels; otherwise show the micro average instead.
+    micro = precision_recall_fscore_support(y_true, y_pred, labels=labels, average="micro", zero_division=0)
+    if np.isin(y_pred, labels).all():
+        lines.append(f"{'accuracy':>{width}}  {'':>9} {'':>9} {micro[2]:>9.2f} {s.sum():>9}")
+    else:
+        lines.append(row.format("micro avg", *micro[:3], s.sum()))
+    lines.append(row.format("macro avg", p.mean(), r.mean(), f.mean(), s.sum()))
+    lines.append(row.format("weighted avg", *(np.average(m, weights=s) for m in (p, r, f)), s.sum()))
+    return lines + [""]
+
+
+def main():
+    print("=" * 70)
+    print("  TRAIN TRIAGE MODEL")
+    print("=" * 70)
+
+    # ── 1. LOAD DATA ──────────────────────────────────────────────────
+    print("\n[1/7] Loading dataset...")
+    df = load_dataset()
+
     print(f"    {len(df):,} rows, {len(df.columns)} columns")
     for src in df["source"].unique():
         n = (df["source"] == src).sum()
@@ -237,31 +396,35 @@ def main():
 
     # ── 2. FEATURE SELECTION ──────────────────────────────────────────
     print("\n[2/7] Selecting features...")
-    sym_cols = [c for c in df.columns if c.startswith("sym_")]
-    pmh_cols = [c for c in df.columns if c.startswith("pmh_")]
+    sym_cols = df.columns[df.columns.str.startswith("sym_")].tolist()
+    pmh_cols = df.columns[df.columns.str.startswith("pmh_")].tolist()
 
     feature_cols = sym_cols + pmh_cols + ["age", "gender_male", "n_symptoms", "n_comorbidities"]
     target_col = "triage_level"
 
-    X = df[feature_cols].copy()
-    y = df[target_col].copy()
-
-    X = X.fillna(0)
+    X = df[feature_cols]
+    y = df[target_col]
     print(f"    {len(feature_cols)} features: {len(sym_cols)} symptom + {len(pmh_cols)} PMH + 4 demographic")
-    print(f"    Target distribution: {dict(Counter(y))}")
+    level_counts = np.bincount(y.to_numpy(), minlength=6)
+    print(f"    Target distribution: { {lvl: int(level_counts[lvl]) for lvl in range(1, 6)} }")
 
     # ── 3. TRAIN/TEST SPLIT ──────────────────────────────────────────
     print("\n[3/7] Splitting train/test (80/20, stratified by level + source)...")
-    strat_key = y.astype(str) + "_" + df["source"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=strat_key
-    )
-    source_train = df["source"].iloc[X_train.index]
-    source_test = df["source"].iloc[X_test.index]
+    # Stratify on level and source together: one integer class per
+    # (level, source) pair, level*10 + the source category code
+    strat_key = y.to_numpy(dtype=np.int16) * 10 + pd.Categorical(df["source"]).codes
+    # Split row positions once and slice every array with them.  The
+    # splitter only looks at strat_key; X is a zero-width placeholder.
+    splitter = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    idx_train, idx_test = next(splitter.split(np.empty((len(df), 0)), strat_key))
+    X_train, X_test = X.iloc[idx_train], X.iloc[idx_test]
+    y_train, y_test = y.iloc[idx_train], y.iloc[idx_test]
+    source = df["source"].to_numpy()
+    source_train, source_test = source[idx_train], source[idx_test]
 
     # Build sample weights: textbook cases get 10x weight
     sample_weights_train = np.ones(len(X_train))
-    tb_mask_train = source_train.values == "textbook"
+    tb_mask_train = source_train == "textbook"
     sample_weights_train[tb_mask_train] = 10.0
     print(f"    Train: {len(X_train):,}  Test: {len(X_test):,}")
     for src in df["source"].unique():
@@ -270,16 +433,32 @@ def main():
         w = "10x" if src == "textbook" else "1x"
         print(f"      {src} — train: {n_tr:,}, test: {n_te:,} (weight: {w})")
 
-    # Scale features
-    scaler = StandardScaler()
+    # Scale only the continuous features; the 0/1 flags pass through
+    # untouched instead of being rewritten as standardised floats.
+    # Columns are picked by position because the app transforms a plain
+    # array built from feature_columns.json.  The transformer outputs the
+    # scaled columns first, so model_cols is the order the models see.
+    scaler = ColumnTransformer(
+        [("num", StandardScaler(), [feature_cols.index(c) for c in NUMERIC_COLS])],
+        remainder="passthrough",
+        sparse_threshold=0.0,
+    )
+    model_cols = NUMERIC_COLS + [c for c in feature_cols if c not in NUMERIC_COLS]
     X_train_sc = scaler.fit_transform(X_train)
     X_test_sc = scaler.transform(X_test)
 
+    # The LR gets a CSR copy: the flags are mostly zero, so each lbfgs
+    # pass multiplies only the stored cells.  XGBoost keeps the dense
+    # matrix — it reads unstored CSR cells as missing rather than 0,
+    # which would not match the dense rows the app predicts on.
+    X_train_lr = csr_matrix(X_train_sc)
+    X_test_lr = csr_matrix(X_test_sc)
+
     # ── 4. TRAIN MODELS ──────────────────────────────────────────────
     # Class weights: heavily penalise missing Level 1 (emergencies)
-    class_counts = Counter(y_train)
+    class_counts = np.bincount(y_train.to_numpy(), minlength=6)
     total = len(y_train)
-    base_weights = {lvl: total / (5 * cnt) for lvl, cnt in class_counts.items()}
+    base_weights = {lvl: total / (5 * int(class_counts[lvl])) for lvl in range(1, 6) if class_counts[lvl]}
     base_weights[1] = base_weights[1] * 3.0  # triple the weight for emergencies
     print(f"\n[4/7] Training models...")
     print(f"    Class weights: { {k: round(v, 2) for k, v in base_weights.items()} }")
@@ -287,46 +466,100 @@ def main():
         print(f"    Textbook rows in train: {tb_mask_train.sum():,} (10x sample weight)")
 
     # ── 4a. Logistic Regression (interpretable) ──
-    print("    Training Logistic Regression...")
+    # lbfgs, not saga: the 10x textbook and 3x Level 1 weights shrink
+    # saga's step size until it stalls, while lbfgs converges in tens of
+    # iterations.  Multinomial is the default loss (multi_class is gone).
     lr = LogisticRegression(
         max_iter=2000,
         class_weight=base_weights,
-        multi_class="multinomial",
         solver="lbfgs",
         C=1.0,
         random_state=42,
     )
-    lr.fit(X_train_sc, y_train, sample_weight=sample_weights_train)
-
-    # ── 4b. Random Forest (primary — fast, multi-threaded) ──
-    print("    Training Random Forest Classifier...")
-    rf_model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=12,
-        min_samples_leaf=20,
-        class_weight=base_weights,
+
+    # ── 4b. XGBoost (primary — histogram trees, early-stopped) ──
+    # XGBoost needs 0..K-1 labels; the encoder maps them back to levels 1-5
+    label_enc = LabelEncoder().fit(y_train)
+    y_train_enc = label_enc.transform(y_train)
+    # No class_weight in XGBoost: fold the class weights into the sample weights
+    xgb_weights_train = sample_weights_train * y_train.map(base_weights).values
+
+    # Hold out 25% of train (stratified): 10% decides when to stop adding
+    # trees, 15% fits the calibrator — the trees never see either slice
+    fit_idx, hold_idx = train_test_split(
+        np.arange(len(X_train_sc)), test_size=0.25, random_state=42, stratify=y_train_enc
+    )
+    val_idx, cal_idx = train_test_split(
+        hold_idx, test_size=0.6, random_state=42, stratify=y_train_enc[hold_idx]
+    )
+    xgb_model = XGBClassifier(
+        n_estimators=1000,
+        max_depth=8,
+        learning_rate=0.1,
+        tree_method="hist",
+        device=XGB_DEVICE,
+        objective="multi:softprob",
+        eval_metric="mlogloss",
+        early_stopping_rounds=20,
         n_jobs=-1,
         random_state=42,
-        verbose=1,
     )
-    rf_model.fit(X_train_sc, y_train, sample_weight=sample_weights_train)
 
-    # ── 4c. Calibrate RF ──
+    # The two fits are independent: run them side by side so the
+    # single-threaded LR solve hides behind XGBoost.  Threads (not
+    # processes) share the training matrices without copying them, and
+    # both solvers spend their time in native code that releases the GIL.
+    print(f"    Training Logistic Regression and XGBoost ({XGB_DEVICE}) in parallel...")
+    Parallel(n_jobs=2, backend="threading")([
+        delayed(lr.fit)(X_train_lr, y_train, sample_weight=sample_weights_train),
+        delayed(xgb_model.fit)(
+            X_train_sc[fit_idx], y_train_enc[fit_idx],
+            sample_weight=xgb_weights_train[fit_idx],
+            eval_set=[(X_train_sc[val_idx], y_train_enc[val_idx])],
+            sample_weight_eval_set=[xgb_weights_train[val_idx]],
+            verbose=False,
+        ),
+    ])
+    print(f"    Early stopping: best iteration {xgb_model.best_iteration + 1} of {xgb_model.n_estimators} "
+          f"(validation mlogloss {xgb_model.best_score:.4f})")
+
+    # ── 4c. Calibrate XGBoost ──
+    # Prefit: the frozen model is not retrained, only the isotonic maps are
+    # fitted on the calibration slice, weighted for textbook cases but not
+    # by class
+    # Predict on CPU from here on: the inputs are host arrays, and the app
+    # that loads triage_xgb.joblib has no GPU
+    xgb_model.set_params(device="cpu")
     print("    Calibrating probabilities...")
-    cal_gb = CalibratedClassifierCV(rf_model, method="isotonic", cv=3)
-    cal_gb.fit(X_train_sc, y_train, sample_weight=sample_weights_train)
+    cal_gb = CalibratedClassifierCV(FrozenEstimator(xgb_model), method="isotonic")
+    with warnings.catch_warnings():
+        # The frozen model ignoring sample_weight is the point here
+        warnings.filterwarnings("ignore", message="Since FrozenEstimator", category=UserWarning)
+        cal_gb.fit(
+            X_train_sc[cal_idx], y_train_enc[cal_idx],
+            sample_weight=sample_weights_train[cal_idx],
+        )
+    # Report levels 1-5 (not the encoded 0-4) to the evaluation and the app
+    cal_gb.classes_ = label_enc.classes_
 
     # ── 5. EVALUATE ──────────────────────────────────────────────────
     print("\n[5/7] Evaluating models...")
 
-    report_lines = []
-    report_lines.append("TRIAGE MODEL TRAINING REPORT")
-    report_lines.append("=" * 60)
-
-    for name, model in [("Logistic Regression", lr),
-                         ("Random Forest (calibrated)", cal_gb)]:
-        y_pred = model.predict(X_test_sc)
-        y_prob = model.predict_proba(X_test_sc)
+    # The report is written into one buffer, saved and echoed in step 7
+    report = io.StringIO()
+    print("TRIAGE MODEL TRAINING REPORT", file=report)
+    print("=" * 60, file=report)
+    print(f"\nXGBoost early stopping: {xgb_model.best_iteration + 1} of {xgb_model.n_estimators} trees, "
+          f"validation mlogloss {xgb_model.best_score:.4f}", file=report)
+
+    # One predict_proba pass per model; the predicted level is its argmax,
+    # and the XGBoost predictions are reused by every section below
+    y_preds = {}
+    for name, model, X_eval in [("Logistic Regression", lr, X_test_lr),
+                                 ("XGBoost (calibrated)", cal_gb, X_test_sc)]:
+        y_prob = model.predict_proba(X_eval)
+        y_pred = model.classes_[y_prob.argmax(axis=1)]
+        y_preds[name] = y_pred
 
         acc = accuracy_score(y_test, y_pred)
         f1_macro = f1_score(y_test, y_pred, average="macro")
@@ -336,141 +569,149 @@ def main():
         level1_mask = y_test == 1
         level1_sens = (y_pred[level1_mask] == 1).mean() if level1_mask.sum() > 0 else 0
 
-        report_lines.append(f"\n{'─' * 60}")
-        report_lines.append(f"MODEL: {name}")
-        report_lines.append(f"{'─' * 60}")
-        report_lines.append(f"  Accuracy:           {acc:.4f}")
-        report_lines.append(f"  F1 (macro):         {f1_macro:.4f}")
-        report_lines.append(f"  F1 (weighted):      {f1_weighted:.4f}")
-        report_lines.append(f"  Level 1 Sensitivity: {level1_sens:.4f}  {'*** CRITICAL ***' if level1_sens < 0.90 else 'OK'}")
-        report_lines.append(f"\n  Classification Report:")
-
-        cr = classification_report(
-            y_test, y_pred,
-            target_names=[f"L{i} {LEVEL_LABELS[i]}" for i in [1, 2, 3, 4, 5]],
-        )
-        for line in cr.split("\n"):
-            report_lines.append(f"    {line}")
+        print(f"\n{'─' * 60}", file=report)
+        print(f"MODEL: {name}", file=report)
+        print(f"{'─' * 60}", file=report)
+        print(f"  Accuracy:           {acc:.4f}", file=report)
+        print(f"  F1 (macro):         {f1_macro:.4f}", file=report)
+        print(f"  F1 (weighted):      {f1_weighted:.4f}", file=report)
+        print(f"  Level 1 Sensitivity: {level1_sens:.4f}  {'*** CRITICAL ***' if level1_sens < 0.90 else 'OK'}", file=report)
+        print(f"\n  Classification Report:", file=report)
+
+        for line in class_report_lines(y_test, y_pred, [1, 2, 3, 4, 5]):
+            print(f"    {line}", file=report)
 
         cm = confusion_matrix(y_test, y_pred, labels=[1, 2, 3, 4, 5])
-        report_lines.append(f"\n  Confusion Matrix (rows=actual, cols=predicted):")
-        report_lines.append(f"    {'':15s}" + "".join(f"{'L'+str(i):>8s}" for i in [1, 2, 3, 4, 5]))
-        for i, row in zip([1, 2, 3, 4, 5], cm):
-            report_lines.append(f"    {'L'+str(i)+' '+LEVEL_LABELS[i]:15s}" + "".join(f"{v:>8d}" for v in row))
+        print(f"\n  Confusion Matrix (rows=actual, cols=predicted):", file=report)
+        print(f"    {'':15s}" + "".join(f"{'L'+str(i):>8s}" for i in [1, 2, 3, 4, 5]), file=report)
+        cm_cells = np.char.rjust(cm.astype(str), 8)  # all cells padded in one call
+        for i, row in zip([1, 2, 3, 4, 5], cm_cells):
+            print(f"    {'L'+str(i)+' '+LEVEL_LABELS[i]:15s}" + "".join(row), file=report)
 
         print(f"\n    {name}:")
         print(f"      Accuracy={acc:.3f}, F1={f1_weighted:.3f}, Level1 Sensitivity={level1_sens:.3f}")
 
     # ── 5b. SOURCE-STRATIFIED EVALUATION ────────────────────────────
-    print("\n    Source-stratified evaluation (Random Forest calibrated):")
-    y_pred_all = cal_gb.predict(X_test_sc)
+    print("\n    Source-stratified evaluation (XGBoost calibrated):")
+    y_pred_gb = y_preds["XGBoost (calibrated)"]
     for src in df["source"].unique():
-        mask = source_test.values == src
+        mask = source_test == src
         if mask.sum() == 0:
             continue
         y_t = y_test.values[mask]
-        y_p = y_pred_all[mask]
+        y_p = y_pred_gb[mask]
         acc = accuracy_score(y_t, y_p)
         f1w = f1_score(y_t, y_p, average="weighted")
         l1_mask = y_t == 1
         l1_sens = (y_p[l1_mask] == 1).mean() if l1_mask.sum() > 0 else 0
         print(f"      {src:8s}: Accuracy={acc:.3f}, F1={f1w:.3f}, L1-Sens={l1_sens:.3f} (n={mask.sum():,})")
-        report_lines.append(f"\n  {src.upper()} subset: Acc={acc:.3f} F1={f1w:.3f} L1-Sens={l1_sens:.3f} (n={mask.sum():,})")
+        print(f"\n  {src.upper()} subset: Acc={acc:.3f} F1={f1w:.3f} L1-Sens={l1_sens:.3f} (n={mask.sum():,})", file=report)
+
+    # ── 5c. RED-FLAG COVERAGE ───────────────────────────────────────
+    # How many Level 1 test patients the red-flag rules alone would catch,
+    # and the L1 sensitivity of rules + model together (as in the app)
+    red_flag_test = red_flag_mask(RED_FLAG_RULES, X_test.to_numpy(), feature_cols)
+    l1_test = y_test.to_numpy() == 1
+    y_pred_flagged = np.where(red_flag_test, 1, y_pred_gb)
+    rules_l1_sens = red_flag_test[l1_test].mean() if l1_test.sum() > 0 else 0
+    flagged_l1_sens = (y_pred_flagged[l1_test] == 1).mean() if l1_test.sum() > 0 else 0
+    print(f"\n    Red flags fire for {red_flag_test.mean():.1%} of test patients")
+    print(f"      L1-Sens: rules alone={rules_l1_sens:.3f}, rules + XGBoost={flagged_l1_sens:.3f}")
+    print(f"\n  Red flags fire for {red_flag_test.mean():.1%} of test patients: "
+          f"L1-Sens rules alone={rules_l1_sens:.3f}, rules + XGBoost={flagged_l1_sens:.3f}", file=report)
 
     # ── 6. TEXTBOOK CASE ACCURACY ─────────────────────────────────────
-    tb_mask_test = source_test.values == "textbook"
+    tb_mask_test = source_test == "textbook"
     if tb_mask_test.sum() > 0:
         print(f"\n[6/7] Textbook case accuracy (n={tb_mask_test.sum()})...")
         y_tb = y_test.values[tb_mask_test]
-        y_tb_pred = y_pred_all[tb_mask_test]
+        y_tb_pred = y_pred_gb[tb_mask_test]
         tb_acc = accuracy_score(y_tb, y_tb_pred)
         tb_l1_mask = y_tb == 1
         tb_l1_sens = (y_tb_pred[tb_l1_mask] == 1).mean() if tb_l1_mask.sum() > 0 else 0
         print(f"    Textbook accuracy: {tb_acc:.3f}")
         print(f"    Textbook L1 sensitivity: {tb_l1_sens:.3f}")
-        report_lines.append(f"\n{'─' * 60}")
-        report_lines.append("TEXTBOOK CASE EVALUATION")
-        report_lines.append(f"{'─' * 60}")
-        report_lines.append(f"  Accuracy: {tb_acc:.4f}")
-        report_lines.append(f"  L1 Sensitivity: {tb_l1_sens:.4f}")
-        report_lines.append(f"  n={tb_mask_test.sum()}")
-        tb_cr = classification_report(
-            y_tb, y_tb_pred,
-            target_names=[f"L{i} {LEVEL_LABELS[i]}" for i in sorted(set(y_tb))],
-            labels=sorted(set(y_tb)),
-        )
-        for line in tb_cr.split("\n"):
-            report_lines.append(f"    {line}")
+        print(f"\n{'─' * 60}", file=report)
+        print("TEXTBOOK CASE EVALUATION", file=report)
+        print(f"{'─' * 60}", file=report)
+        print(f"  Accuracy: {tb_acc:.4f}", file=report)
+        print(f"  L1 Sensitivity: {tb_l1_sens:.4f}", file=report)
+        print(f"  n={tb_mask_test.sum()}", file=report)
+        for line in class_report_lines(y_tb, y_tb_pred, sorted(set(y_tb))):
+            print(f"    {line}", file=report)
     else:
         print(f"\n[6/7] No textbook cases in test set, skipping...")
 
     # ── 7. SAVE ARTIFACTS ────────────────────────────────────────────
     print("\n[7/7] Saving model artifacts...")
 
-    joblib.dump(cal_gb, MODEL_DIR / "triage_xgb.joblib", compress=("zlib", 3))
-    joblib.dump(lr, MODEL_DIR / "triage_lr.joblib", compress=("zlib", 3))
-    joblib.dump(scaler, MODEL_DIR / "scaler.joblib", compress=("zlib", 3))
+    # Older scikit-learn (1.6 included) fits lbfgs in float64; store the
+    # LR weights as float32 either way
+    lr.coef_ = lr.coef_.astype(np.float32, copy=False)
+    lr.intercept_ = lr.intercept_.astype(np.float32, copy=False)
+
+    joblib.dump(cal_gb, MODEL_DIR / "triage_xgb.joblib", compress=MODEL_COMPRESS)
+    joblib.dump(lr, MODEL_DIR / "triage_lr.joblib", compress=MODEL_COMPRESS)
+    joblib.dump(scaler, MODEL_DIR / "scaler.joblib", compress=MODEL_COMPRESS)
     model_mb = (MODEL_DIR / "triage_xgb.joblib").stat().st_size / 1024 / 1024
-    print(f"    Saved models to {MODEL_DIR} (RF model: {model_mb:.1f} MB)")
+    print(f"    Saved models to {MODEL_DIR} (XGBoost model: {model_mb:.1f} MB)")
 
-    with open(MODEL_DIR / "feature_columns.json", "w") as f:
-        json.dump(feature_cols, f, indent=2)
+    (MODEL_DIR / "feature_columns.json").write_bytes(orjson.dumps(feature_cols, option=JSON_OPTIONS))
     print(f"    Saved feature_columns.json ({len(feature_cols)} features)")
 
-    with open(CFG_DIR / "red_flags.json", "w") as f:
-        json.dump(RED_FLAG_RULES, f, indent=2)
+    (CFG_DIR / "red_flags.json").write_bytes(orjson.dumps(RED_FLAG_RULES, option=JSON_OPTIONS))
     print(f"    Saved red_flags.json ({len(RED_FLAG_RULES)} rules)")
 
     # ── Update evidence stats with model performance ──
     evidence_path = CFG_DIR / "evidence_stats.json"
     if evidence_path.exists():
-        with open(evidence_path) as f:
-            evidence = json.load(f)
+        evidence = orjson.loads(evidence_path.read_bytes())
     else:
         evidence = {}
 
-    y_pred_gb = cal_gb.predict(X_test_sc)
     level1_sens_gb = (y_pred_gb[y_test == 1] == 1).mean()
     evidence["model_performance"] = {
-        "accuracy": round(float(accuracy_score(y_test, y_pred_gb)), 4),
-        "f1_weighted": round(float(f1_score(y_test, y_pred_gb, average="weighted")), 4),
-        "level1_sensitivity": round(float(level1_sens_gb), 4),
-        "test_size": int(len(X_test)),
-        "train_size": int(len(X_train)),
+        "accuracy": round(accuracy_score(y_test, y_pred_gb), 4),
+        "f1_weighted": round(f1_score(y_test, y_pred_gb, average="weighted"), 4),
+        "level1_sensitivity": round(level1_sens_gb, 4),
+        "test_size": len(X_test),
+        "train_size": len(X_train),
     }
 
-    # Per-symptom evidence: model prediction distributions
-    df_test = df.iloc[X_test.index].copy()
-    df_test["model_pred"] = y_pred_gb
+    # Per-symptom evidence: model prediction distributions, counted for
+    # every symptom at once as (symptoms x patients) @ (patients x levels)
+    sym_test = X_test[sym_cols].to_numpy(np.float32)
+    pred_onehot = np.eye(5, dtype=np.float32)[y_pred_gb - 1]
+    sym_pred_counts = sym_test.T @ pred_onehot
+    sym_totals = sym_test.sum(axis=0)
+    sym_index = {col: i for i, col in enumerate(sym_cols)}
     for cat_id in evidence.get("by_symptom", {}):
-        col = f"sym_{cat_id}"
-        if col in df_test.columns:
-            subset = df_test[df_test[col] == 1]
-            if len(subset) > 20:
-                evidence["by_symptom"][cat_id]["model_pred_pcts"] = {
-                    int(lvl): round(100 * (subset["model_pred"] == lvl).mean(), 1)
-                    for lvl in [1, 2, 3, 4, 5]
-                }
-
-    with open(evidence_path, "w") as f:
-        json.dump(evidence, f, indent=2)
+        i = sym_index.get(f"sym_{cat_id}")
+        if i is not None and sym_totals[i] > 20:
+            evidence["by_symptom"][cat_id]["model_pred_pcts"] = {
+                lvl: round(float(100 * sym_pred_counts[i, lvl - 1] / sym_totals[i]), 1)
+                for lvl in [1, 2, 3, 4, 5]
+            }
+
+    evidence_path.write_bytes(orjson.dumps(evidence, option=JSON_OPTIONS))
     print(f"    Updated evidence_stats.json with model performance")
 
-    # Feature importance (Random Forest)
-    importances = rf_model.feature_importances_
-    top_features = sorted(zip(feature_cols, importances), key=lambda x: -x[1])[:20]
-    report_lines.append(f"\n{'─' * 60}")
-    report_lines.append("TOP 20 FEATURE IMPORTANCES (XGBoost)")
-    report_lines.append(f"{'─' * 60}")
+    # Feature importance (XGBoost)
+    importances = xgb_model.feature_importances_
+    top_features = sorted(zip(model_cols, importances), key=lambda x: -x[1])[:20]
+    print(f"\n{'─' * 60}", file=report)
+    print("TOP 20 FEATURE IMPORTANCES (XGBoost)", file=report)
+    print(f"{'─' * 60}", file=report)
     for feat, imp in top_features:
-        report_lines.append(f"  {feat:40s}: {imp:.4f}")
+        print(f"  {feat:40s}: {imp:.4f}", file=report)
 
-    report_text = "\n".join(report_lines)
+    report_text = report.getvalue()
     with open(REPORT_DIR / "training_report.txt", "w") as f:
         f.write(report_text)
     print(f"    Saved training_report.txt")
 
-    print(f"\n{report_text}")
+    sys.stdout.write("\n")
+    sys.stdout.write(report_text)
     print("\n  Phase 2 complete.")
 
 